@@ -1,25 +1,46 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import time
+import uuid
+import weakref
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# Try to import plotly, fallback to basic charts if not available
-try:
-    import plotly.graph_objects as go
-    import plotly.express as px
-    PLOTLY_AVAILABLE = True
-except ImportError:
-    PLOTLY_AVAILABLE = False
+# Check for plotly without importing it - charts import it on first use,
+# fallback to basic charts if not available
+PLOTLY_AVAILABLE = importlib.util.find_spec('plotly') is not None
+
+# Check for supabase without importing it - the client is imported on connect
+SUPABASE_AVAILABLE = importlib.util.find_spec('supabase') is not None
 
-# Try to import supabase
+# Try to import orjson for faster JSON (de)serialization
 try:
-    from supabase import create_client, Client
-    SUPABASE_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    SUPABASE_AVAILABLE = False
+    ORJSON_AVAILABLE = False
+
+def json_dumps(data) -> bytes:
+    """Serialize a request body to JSON bytes"""
+    if ORJSON_AVAILABLE:
+        # Trade rows can carry NumPy scalars from the demo generators
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data).encode('utf-8')
+
+def json_loads(content: bytes):
+    """Parse a JSON response body"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(content)
+    return json.loads(content)
+
+# Shared generator for live demo values (ticker, simulated trades)
+RNG = np.random.default_rng()
 
 # Supabase HTTP Client Class
 class SupabaseConnector:
@@ -30,11 +51,39 @@ class SupabaseConnector:
         self.client = None
         self.connected = False
         
+        # Keep-alive session so repeated REST calls reuse the same TLS connection
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                # Read/status retries are GET-only - a POST that timed out or got a 5xx
+                # may already be committed; connect errors still retry every method
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._finalizer = weakref.finalize(self, self.session.close)
+        
     def configure(self, url: str, anon_key: str, service_key: str = None):
         """Configure Supabase connection parameters"""
         self.url = url.rstrip('/')
         self.anon_key = anon_key
         self.service_key = service_key
+        self.session.headers.update({
+            'apikey': self.anon_key,
+            'Authorization': f'Bearer {self.anon_key}',
+            'Content-Type': 'application/json'
+        })
+    
+    def close(self):
+        """Close pooled HTTP connections"""
+        self._finalizer()
         
     def connect(self):
         """Establish connection to Supabase"""
@@ -42,8 +91,13 @@ class SupabaseConnector:
             if not self.url or not self.anon_key:
                 raise ValueError("URL and anon key are required")
                 
+            if self.connected:
+                # Already verified for these credentials, skip the extra round-trip
+                return True, "Already connected to Supabase"
+                
             if SUPABASE_AVAILABLE:
                 # Use official Supabase client
+                from supabase import create_client
                 self.client = create_client(self.url, self.anon_key)
                 self.connected = True
                 return True, "Connected successfully using Supabase client"
@@ -59,18 +113,26 @@ class SupabaseConnector:
             self.connected = False
             return False, f"Connection error: {str(e)}"
     
+    def _request(self, method: str, path: str, **kwargs):
+        """Send a REST request on the pooled session, raising on HTTP errors"""
+        response = self.session.request(
+            method,
+            f"{self.url}/rest/v1/{path}",
+            timeout=10,
+            **kwargs
+        )
+        if not response.ok:
+            if response.status_code in (401, 403):
+                # Key expired or revoked - the next Connect has to verify again
+                self.connected = False
+            raise requests.HTTPError(response.text, response=response)
+        return response
+    
     def _test_connection(self):
         """Test connection using direct HTTP call"""
         try:
-            headers = {
-                'apikey': self.anon_key,
-                'Authorization': f'Bearer {self.anon_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/rest/v1/",
-                headers=headers,
                 timeout=10
             )
             
@@ -78,71 +140,89 @@ class SupabaseConnector:
         except Exception:
             return False
     
+    @staticmethod
+    def _failure_kind(error: Exception) -> str:
+        """Classify a failed write: 'rejected' (the rows themselves were refused and
+        nothing was written), 'transient' (network or server error, safe to resend)
+        or 'refused' (auth, missing table or schema - resending will not help)"""
+        if isinstance(error, requests.HTTPError):
+            response = error.response
+            if response is None or response.status_code >= 500 or response.status_code in (408, 429):
+                return 'transient'
+            try:
+                code = str(json_loads(response.content).get('code') or '')
+            except (ValueError, AttributeError):
+                code = ''
+        elif isinstance(error, requests.RequestException):
+            return 'transient'
+        else:
+            # Official client raises APIError carrying the Postgres/PostgREST error
+            # code; network errors from its HTTP layer carry none
+            code = str(getattr(error, 'code', None) or '')
+            if not code or code.startswith(('08', '40', '53', '57', 'PGRST0')):
+                return 'transient'
+        # Postgres data exceptions (22) and constraint violations (23) are about the rows
+        return 'rejected' if code.startswith(('22', '23')) else 'refused'
+    
+    def _insert(self, rows):
+        """Insert one trade or a list of trades, ignoring trade_ids already stored
+        so a resend after an ambiguous failure cannot duplicate rows"""
+        if SUPABASE_AVAILABLE and self.client:
+            # Use official client
+            self.client.table('trades').upsert(rows, on_conflict='trade_id', ignore_duplicates=True).execute()
+        else:
+            # Use HTTP client - PostgREST accepts a JSON array body
+            self._request(
+                'POST', 'trades?on_conflict=trade_id',
+                headers={'Prefer': 'return=minimal,resolution=ignore-duplicates'},
+                data=json_dumps(rows)
+            )
+    
     def insert_trade(self, trade_data: dict):
-        """Insert trade data into Supabase"""
+        """Insert trade data into Supabase - returns (success, message, failure kind)"""
         if not self.connected:
-            return False, "Not connected to Supabase"
+            return False, "Not connected to Supabase", 'refused'
             
         try:
-            if SUPABASE_AVAILABLE and self.client:
-                # Use official client
-                result = self.client.table('trades').insert(trade_data).execute()
-                return True, "Trade inserted successfully"
-            else:
-                # Use HTTP client
-                headers = {
-                    'apikey': self.anon_key,
-                    'Authorization': f'Bearer {self.anon_key}',
-                    'Content-Type': 'application/json',
-                    'Prefer': 'return=minimal'
-                }
-                
-                response = requests.post(
-                    f"{self.url}/rest/v1/trades",
-                    headers=headers,
-                    json=trade_data,
-                    timeout=10
-                )
-                
-                if response.status_code in [200, 201]:
-                    return True, "Trade inserted successfully"
-                else:
-                    return False, f"Insert failed: {response.text}"
-                    
+            self._insert(trade_data)
+            return True, "Trade inserted successfully", None
         except Exception as e:
-            return False, f"Insert error: {str(e)}"
+            return False, f"Insert error: {str(e)}", self._failure_kind(e)
     
-    def get_trades(self, limit: int = 100):
-        """Fetch trades from Supabase"""
+    def insert_trades(self, trades: list):
+        """Insert several trades into Supabase with a single request - returns (success, message, failure kind)"""
         if not self.connected:
-            return [], "Not connected to Supabase"
+            return False, "Not connected to Supabase", 'refused'
             
+        try:
+            self._insert(trades)
+            return True, f"{len(trades)} trades inserted successfully", None
+        except Exception as e:
+            return False, f"Insert error: {str(e)}", self._failure_kind(e)
+    
+    def insert_trades_parallel(self, trades: list, workers: int = 8):
+        """Insert trades with one request each, run concurrently - returns a (success, message, failure kind) per trade"""
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(trades)))) as executor:
+            return list(executor.map(self.insert_trade, trades))
+    
+    def get_trades(self, limit: int = 100, columns=None):
+        """Fetch trades from Supabase, optionally only the given columns - trades is None on failure"""
+        if not self.connected:
+            return None, "Not connected to Supabase"
+            
+        select = ','.join(columns) if columns else '*'
         try:
             if SUPABASE_AVAILABLE and self.client:
                 # Use official client
-                result = self.client.table('trades').select('*').limit(limit).execute()
+                result = self.client.table('trades').select(select).limit(limit).execute()
                 return result.data, "Trades fetched successfully"
             else:
                 # Use HTTP client
-                headers = {
-                    'apikey': self.anon_key,
-                    'Authorization': f'Bearer {self.anon_key}',
-                    'Content-Type': 'application/json'
-                }
-                
-                response = requests.get(
-                    f"{self.url}/rest/v1/trades?limit={limit}",
-                    headers=headers,
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    return response.json(), "Trades fetched successfully"
-                else:
-                    return [], f"Fetch failed: {response.text}"
+                response = self._request('GET', f"trades?select={select}&limit={limit}")
+                return json_loads(response.content), "Trades fetched successfully"
                     
         except Exception as e:
-            return [], f"Fetch error: {str(e)}"
+            return None, f"Fetch error: {str(e)}"
     
     def create_tables(self):
         """Create necessary tables - Returns SQL for manual execution"""
@@ -150,11 +230,12 @@ class SupabaseConnector:
 -- Create trades table
 CREATE TABLE IF NOT EXISTS public.trades (
     id BIGSERIAL PRIMARY KEY,
+    trade_id UUID NOT NULL UNIQUE DEFAULT gen_random_uuid(),
     symbol VARCHAR(20) NOT NULL,
     side VARCHAR(10) NOT NULL CHECK (side IN ('buy', 'sell')),
     quantity DECIMAL(18,8) NOT NULL,
     price DECIMAL(18,8) NOT NULL,
-    timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    trade_timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     strategy VARCHAR(50),
     pnl DECIMAL(18,8),
     status VARCHAR(20) DEFAULT 'completed',
@@ -201,7 +282,7 @@ CREATE POLICY "Allow anon to manage sessions" ON public.trading_sessions
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_trades_symbol ON public.trades(symbol);
-CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON public.trades(timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON public.trades(trade_timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_portfolio_symbol ON public.portfolio(symbol);
 
 -- Create a function to update portfolio automatically
@@ -214,7 +295,7 @@ BEGIN
         NEW.symbol,
         CASE WHEN NEW.side = 'buy' THEN NEW.quantity ELSE -NEW.quantity END,
         NEW.price,
-        NEW.timestamp
+        NEW.trade_timestamp
     )
     ON CONFLICT (symbol) DO UPDATE SET
         quantity = portfolio.quantity + CASE WHEN NEW.side = 'buy' THEN NEW.quantity ELSE -NEW.quantity END,
@@ -223,7 +304,7 @@ BEGIN
             ELSE (portfolio.avg_price * portfolio.quantity + NEW.price * CASE WHEN NEW.side = 'buy' THEN NEW.quantity ELSE -NEW.quantity END) / 
                  (portfolio.quantity + CASE WHEN NEW.side = 'buy' THEN NEW.quantity ELSE -NEW.quantity END)
         END,
-        updated_at = NEW.timestamp;
+        updated_at = NEW.trade_timestamp;
     
     RETURN NEW;
 END;
@@ -239,6 +320,226 @@ CREATE TRIGGER trigger_update_portfolio
         
         return True, sql_script
 
+@st.cache_resource(show_spinner=False)
+def get_supabase_connector(url: str, anon_key: str, service_key: str = None):
+    """Process-wide connector per set of credentials, so sessions share one connection pool"""
+    connector = SupabaseConnector()
+    connector.configure(url, anon_key, service_key)
+    return connector
+
+# Simulated trades are buffered and written in batches
+TRADE_BUFFER_MAX = 20
+TRADE_FLUSH_INTERVAL = 5  # seconds
+
+def flush_trade_buffer():
+    """Write all buffered trades to Supabase in one request, falling back to per-trade inserts"""
+    buffer = st.session_state.trade_buffer
+    if not buffer:
+        return True, "No pending trades"
+    
+    connector = st.session_state.supabase_connector
+    success, message, failure = connector.insert_trades(buffer)
+    if success:
+        saved, failed, kinds = len(buffer), [], []
+    elif failure == 'rejected' and len(buffer) > 1:
+        # The batch is refused as a whole if any row is bad and nothing is
+        # written - retry rows individually so the valid ones are still saved
+        results = connector.insert_trades_parallel(buffer)
+        saved = sum(ok for ok, _, _ in results)
+        # Rows refused on their own are dropped; the rest stay buffered
+        failed = [trade for trade, (ok, _, kind) in zip(buffer, results) if not ok and kind != 'rejected']
+        kinds = [kind for ok, _, kind in results if not ok]
+        errors = [msg for ok, msg, _ in results if not ok]
+        success = not errors
+        if errors:
+            dropped = len(errors) - len(failed)
+            message = f"{len(errors)} of {len(buffer)} trades failed ({dropped} rejected and dropped): {errors[0]}"
+        else:
+            message = f"{len(buffer)} trades inserted individually"
+    elif failure == 'rejected':
+        # A single rejected trade will never succeed - drop it
+        saved, failed, kinds = 0, [], [failure]
+        message = f"Trade rejected and dropped: {message}"
+    else:
+        # Keep the whole buffer - every trade carries a trade_id and inserts skip
+        # ids already stored, so resending a batch that was committed before a
+        # timeout or 5xx cannot duplicate it
+        saved, failed, kinds = 0, buffer, [failure]
+    
+    if 'refused' in kinds:
+        # Expired key, missing table or schema mismatch - stop flushing
+        # automatically until the user reconnects from Settings
+        st.session_state.supabase_connected = False
+        message = f"{message} - reconnect in Settings to retry"
+    
+    if saved:
+        st.session_state.total_trades += saved
+        fetch_recent_trades.clear()
+    st.session_state.trade_buffer = failed
+    st.session_state.last_trade_flush = time.time()
+    return success, message
+
+def flush_stale_trades():
+    """Flush buffered trades that have waited longer than the flush interval"""
+    if (st.session_state.trade_buffer and st.session_state.supabase_connected
+            and time.time() - st.session_state.last_trade_flush > TRADE_FLUSH_INTERVAL):
+        success, message = flush_trade_buffer()
+        if not success:
+            st.error(f"❌ Failed to save trades: {message}")
+
+@st.fragment(run_every=1)
+def live_price_ticker(last_price: float):
+    """Live price ticker - reruns on its own without rerunning the whole page"""
+    current_price = last_price + RNG.standard_normal() * 50
+    st.metric(
+        label="Current Price",
+        value=f"${current_price:,.2f}",
+        delta=f"{RNG.standard_normal() * 2:+.2f}%"
+    )
+    flush_stale_trades()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_price_history(base_price: float, days: int = 30) -> pd.DataFrame:
+    """Hourly demo price history, regenerated at most once a minute"""
+    end = datetime.now()
+    dates = pd.date_range(start=end - timedelta(days=days), end=end, freq='h')
+    rng = np.random.default_rng(42)
+    
+    # Sample price data as a vectorized random walk
+    n = len(dates)
+    prices = base_price + np.cumsum(rng.standard_normal(n) * 100)
+    np.maximum(prices, base_price * 0.8, out=prices)  # Prevent negative prices
+    volumes = rng.integers(100, 1000, size=n, dtype=np.int16)
+    
+    # float32 is ample for charting and halves what is cached and serialized
+    return pd.DataFrame({'timestamp': dates, 'price': prices.astype(np.float32), 'volume': volumes})
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def load_portfolio_history(seed: int, days: int = 30):
+    """Daily demo portfolio values, generated once per seed (one seed per day)"""
+    end = datetime.now()
+    dates = pd.date_range(start=end - timedelta(days=days), end=end, freq='D')
+    rng = np.random.default_rng(seed)
+    values = np.cumsum(rng.standard_normal(len(dates)) * 100) + 10000
+    return dates, values.astype(np.float32)
+
+# Longer series are downsampled before charting
+MAX_CHART_POINTS = 1000
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, threshold: int):
+    """Largest-Triangle-Three-Buckets downsampling - keeps the visual shape of a line series"""
+    n = len(y)
+    if threshold < 3 or n <= threshold:
+        return x, y
+    
+    xf = x.astype('int64') if np.issubdtype(x.dtype, np.datetime64) else x
+    xf = xf.astype(float)
+    yf = y.astype(float)
+    
+    # First and last points are kept, the rest are split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = xf[next_lo:next_hi].mean()
+        avg_y = yf[next_lo:next_hi].mean()
+        
+        # Keep the point forming the largest triangle with the previous pick and the next bucket's average
+        area = np.abs((xf[a] - avg_x) * (yf[lo:hi] - yf[a]) - (xf[a] - xf[lo:hi]) * (avg_y - yf[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    
+    return x[selected], y[selected]
+
+@st.cache_data(ttl=60, max_entries=4, show_spinner=False)
+def build_price_figure(timestamps: np.ndarray, prices: np.ndarray) -> dict:
+    """Price chart spec, rebuilt only when the price data changes"""
+    import plotly.graph_objects as go
+    
+    timestamps, prices = downsample_lttb(timestamps, prices, MAX_CHART_POINTS)
+    
+    fig = go.Figure(data=go.Scattergl(
+        x=timestamps,
+        y=prices,
+        mode='lines',
+        name='Price',
+        line=dict(color='#1f77b4', width=2)
+    ))
+    
+    fig.update_layout(
+        title="Price Chart",
+        xaxis_title="Time",
+        yaxis_title="Price ($)",
+        height=400
+    )
+    
+    return fig.to_dict()
+
+# Columns shown in the Recent Trades table - only these are requested from PostgREST
+TRADE_DISPLAY_COLUMNS = ('symbol', 'side', 'quantity', 'price', 'pnl', 'strategy', 'trade_timestamp')
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def build_portfolio_figure(dates, values):
+    """Portfolio line chart, built once per cached portfolio series"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(go.Scattergl(x=dates, y=values, mode='lines'))
+    fig.update_layout(title="Portfolio Value Over Time")
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_win_loss_figure(wins: int, losses: int):
+    """Win/Loss pie chart, built once per outcome counts"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure(go.Pie(labels=['Wins', 'Losses'], values=[wins, losses]))
+    fig.update_layout(title="Win/Loss Ratio")
+    return fig
+
+class TradeFetchError(Exception):
+    """Raised inside the trades cache so failed fetches are not cached"""
+
+@st.cache_data(ttl=30, show_spinner=False)
+def fetch_recent_trades(_connector, url: str, anon_key: str, service_key: str, limit: int, columns: tuple = None):
+    """Fetch recent trades, cached per set of credentials until a write or reload"""
+    trades, message = _connector.get_trades(limit, columns)
+    if trades is None:
+        raise TradeFetchError(message)
+    return trades, message
+
+def load_recent_trades(connector, limit: int, columns: tuple = None):
+    """Recent trades for the connector's credentials as (trades, message)"""
+    try:
+        return fetch_recent_trades(
+            connector, connector.url, connector.anon_key, connector.service_key, limit, columns
+        )
+    except TradeFetchError as e:
+        return [], str(e)
+
+# Static UI options and demo data, built once at import
+STRATEGIES = ("Moving Average Crossover", "RSI Oversold/Overbought", "Bollinger Bands", "MACD Signal")
+TRADING_PAIRS = ("BTC/USD", "ETH/USD", "AAPL", "TSLA", "GOOGL", "AMZN", "MSFT")
+EXCHANGES = ("Binance", "Coinbase Pro", "Kraken", "Alpaca")
+
+# PnL columns are derived in one vectorized pass rather than hardcoded per row;
+# shorts gain when the price falls, so both are signed by the position side
+DEMO_POSITIONS = pd.DataFrame({
+    'Symbol': ['BTC/USD', 'ETH/USD', 'AAPL'],
+    'Side': ['Long', 'Short', 'Long'],
+    'Size': [0.5, 2.0, 100],
+    'Entry Price': [48500, 3200, 175.50],
+    'Current Price': [49200, 3150, 178.25],
+}).assign(**{
+    'PnL': lambda d: d.eval("(`Current Price` - `Entry Price`) * Size")
+        * np.where(d['Side'] == 'Short', -1, 1),
+    'PnL %': lambda d: (d.eval("(`Current Price` / `Entry Price` - 1) * 100")
+        * np.where(d['Side'] == 'Short', -1, 1)).round(2),
+})
+
 # Page configuration
 st.set_page_config(
     page_title="AutoTrader Pro",
@@ -248,7 +549,7 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -274,21 +575,25 @@ st.markdown("""
         font-weight: bold;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Initialize session state
-if 'trading_active' not in st.session_state:
-    st.session_state.trading_active = False
-if 'portfolio_value' not in st.session_state:
-    st.session_state.portfolio_value = 10000.0
-if 'total_trades' not in st.session_state:
-    st.session_state.total_trades = 0
-if 'daily_pnl' not in st.session_state:
-    st.session_state.daily_pnl = 0.0
+SESSION_DEFAULTS = {
+    'trading_active': False,
+    'portfolio_value': 10000.0,
+    'total_trades': 0,
+    'daily_pnl': 0.0,
+    'supabase_connected': False,
+}
+for key, value in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, value)
+st.session_state.setdefault('trade_buffer', [])
+st.session_state.setdefault('last_trade_flush', time.time())
+
+# The connector is only created when missing so a Session isn't built on every rerun
 if 'supabase_connector' not in st.session_state:
     st.session_state.supabase_connector = SupabaseConnector()
-if 'supabase_connected' not in st.session_state:
-    st.session_state.supabase_connected = False
 
 # Header
 st.markdown('<h1 class="main-header">AutoTrader Pro 📈</h1>', unsafe_allow_html=True)
@@ -299,7 +604,7 @@ st.sidebar.header("🎛️ Trading Controls")
 # Trading Strategy Selection
 strategy = st.sidebar.selectbox(
     "Select Trading Strategy",
-    ["Moving Average Crossover", "RSI Oversold/Overbought", "Bollinger Bands", "MACD Signal"]
+    STRATEGIES
 )
 
 # Risk Management
@@ -312,9 +617,10 @@ take_profit = st.sidebar.slider("Take Profit (%)", 1, 50, 15)
 st.sidebar.subheader("Trading Pairs")
 selected_pairs = st.sidebar.multiselect(
     "Select Trading Pairs",
-    ["BTC/USD", "ETH/USD", "AAPL", "TSLA", "GOOGL", "AMZN", "MSFT"],
+    TRADING_PAIRS,
     default=["BTC/USD", "ETH/USD"]
 )
+pairs_set = frozenset(selected_pairs)
 
 # Trading Control Button
 if st.sidebar.button("🚀 Start Trading" if not st.session_state.trading_active else "⏹️ Stop Trading"):
@@ -360,40 +666,12 @@ with tab1:
     st.subheader("Live Market Data")
     
     # Generate sample data for demonstration
-    dates = pd.date_range(start=datetime.now() - timedelta(days=30), end=datetime.now(), freq='H')
-    np.random.seed(42)
-    
-    # Sample price data
-    price_data = []
-    base_price = 50000 if "BTC" in str(selected_pairs) else 3000
-    
-    for i, date in enumerate(dates):
-        price = base_price + np.cumsum(np.random.randn(1) * 100)[0]
-        price_data.append({
-            'timestamp': date,
-            'price': max(price, base_price * 0.8),  # Prevent negative prices
-            'volume': np.random.randint(100, 1000)
-        })
-    
-    df = pd.DataFrame(price_data)
+    base_price = 50000 if "BTC/USD" in pairs_set else 3000
+    df = load_price_history(base_price, 30)
     
     # Create price chart
     if PLOTLY_AVAILABLE:
-        fig = go.Figure(data=go.Scatter(
-            x=df['timestamp'],
-            y=df['price'],
-            mode='lines',
-            name='Price',
-            line=dict(color='#1f77b4', width=2)
-        ))
-        
-        fig.update_layout(
-            title="Price Chart",
-            xaxis_title="Time",
-            yaxis_title="Price ($)",
-            height=400
-        )
-        
+        fig = build_price_figure(df['timestamp'].values, df['price'].values)
         st.plotly_chart(fig, use_container_width=True)
     else:
         # Fallback to Streamlit's built-in line chart
@@ -403,15 +681,7 @@ with tab1:
     
     # Real-time price ticker
     if st.session_state.trading_active:
-        placeholder = st.empty()
-        for i in range(5):
-            current_price = df['price'].iloc[-1] + np.random.randn() * 50
-            placeholder.metric(
-                label="Current Price",
-                value=f"${current_price:,.2f}",
-                delta=f"{np.random.randn() * 2:+.2f}%"
-            )
-            time.sleep(1)
+        live_price_ticker(float(df['price'].iloc[-1]))
 
 with tab2:
     st.subheader("Current Positions")
@@ -423,43 +693,45 @@ with tab2:
             if st.button("📝 Simulate Trade"):
                 # Simulate a new trade
                 trade_data = {
-                    'symbol': np.random.choice(['BTC/USD', 'ETH/USD', 'AAPL', 'TSLA']),
-                    'side': np.random.choice(['buy', 'sell']),
-                    'quantity': round(np.random.uniform(0.1, 2.0), 4),
-                    'price': round(np.random.uniform(100, 50000), 2),
+                    'trade_id': str(uuid.uuid4()),
+                    'symbol': RNG.choice(['BTC/USD', 'ETH/USD', 'AAPL', 'TSLA']),
+                    'side': RNG.choice(['buy', 'sell']),
+                    'quantity': round(RNG.uniform(0.1, 2.0), 4),
+                    'price': round(RNG.uniform(100, 50000), 2),
                     'strategy': strategy,
-                    'pnl': round(np.random.uniform(-100, 200), 2),
-                    'trade_timestamp': datetime.now().isoformat()
+                    'pnl': round(RNG.uniform(-100, 200), 2),
+                    'trade_timestamp': datetime.now(timezone.utc).isoformat()
                 }
                 
-                with st.spinner("Saving trade to database..."):
-                    success, message = st.session_state.supabase_connector.insert_trade(trade_data)
-                    if success:
-                        st.success("✅ Trade saved to database!")
-                        st.session_state.total_trades += 1
-                    else:
-                        st.error(f"❌ Failed to save trade: {message}")
+                st.session_state.trade_buffer.append(trade_data)
+                
+                if (len(st.session_state.trade_buffer) >= TRADE_BUFFER_MAX
+                        or time.time() - st.session_state.last_trade_flush > TRADE_FLUSH_INTERVAL):
+                    pending = len(st.session_state.trade_buffer)
+                    with st.spinner("Saving trades to database..."):
+                        success, message = flush_trade_buffer()
+                        if success:
+                            st.success(f"✅ {pending} trade(s) saved to database!")
+                        else:
+                            st.error(f"❌ Failed to save trades: {message}")
+                else:
+                    st.info(f"📝 Trade queued ({len(st.session_state.trade_buffer)} pending)")
     
     # Sample positions data
-    positions_data = {
-        'Symbol': ['BTC/USD', 'ETH/USD', 'AAPL'],
-        'Side': ['Long', 'Short', 'Long'],
-        'Size': [0.5, 2.0, 100],
-        'Entry Price': [48500, 3200, 175.50],
-        'Current Price': [49200, 3150, 178.25],
-        'PnL': [350, -100, 275],
-        'PnL %': [1.44, -1.56, 1.57]
-    }
-    
-    positions_df = pd.DataFrame(positions_data)
-    
-    # Color code PnL
-    def color_pnl(val):
-        color = 'green' if val > 0 else 'red'
-        return f'color: {color}'
+    positions_df = DEMO_POSITIONS
     
-    styled_df = positions_df.style.applymap(color_pnl, subset=['PnL', 'PnL %'])
-    st.dataframe(styled_df, use_container_width=True)
+    # Native column formatting keeps the table on the Arrow path (no Styler);
+    # signed PnL values stand in for the old green/red coloring
+    st.dataframe(
+        positions_df,
+        column_config={
+            'Entry Price': st.column_config.NumberColumn(format="$%.2f"),
+            'Current Price': st.column_config.NumberColumn(format="$%.2f"),
+            'PnL': st.column_config.NumberColumn(format="$%+.2f"),
+            'PnL %': st.column_config.NumberColumn(format="%+.2f%%"),
+        },
+        use_container_width=True
+    )
 
 with tab3:
     st.subheader("Performance Analytics")
@@ -468,15 +740,10 @@ with tab3:
     
     with col1:
         # Portfolio value over time
-        portfolio_dates = pd.date_range(start=datetime.now() - timedelta(days=30), end=datetime.now(), freq='D')
-        portfolio_values = np.cumsum(np.random.randn(len(portfolio_dates)) * 100) + 10000
+        portfolio_dates, portfolio_values = load_portfolio_history(int(datetime.now().strftime('%Y%m%d')))
         
         if PLOTLY_AVAILABLE:
-            fig_portfolio = px.line(
-                x=portfolio_dates,
-                y=portfolio_values,
-                title="Portfolio Value Over Time"
-            )
+            fig_portfolio = build_portfolio_figure(portfolio_dates.to_numpy(), portfolio_values)
             st.plotly_chart(fig_portfolio, use_container_width=True)
         else:
             st.subheader("Portfolio Value Over Time")
@@ -489,12 +756,7 @@ with tab3:
     with col2:
         # Win/Loss ratio
         if PLOTLY_AVAILABLE:
-            win_loss_data = {'Outcome': ['Wins', 'Losses'], 'Count': [65, 35]}
-            fig_pie = px.pie(
-                values=win_loss_data['Count'],
-                names=win_loss_data['Outcome'],
-                title="Win/Loss Ratio"
-            )
+            fig_pie = build_win_loss_figure(65, 35)
             st.plotly_chart(fig_pie, use_container_width=True)
         else:
             st.subheader("Win/Loss Ratio")
@@ -564,8 +826,8 @@ with tab4:
     if connect_clicked:
         if supabase_url and anon_key:
             with st.spinner("Connecting to Supabase..."):
-                st.session_state.supabase_connector.configure(
-                    supabase_url, anon_key, service_key
+                st.session_state.supabase_connector = get_supabase_connector(
+                    supabase_url.rstrip('/'), anon_key, service_key
                 )
                 success, message = st.session_state.supabase_connector.connect()
                 
@@ -584,16 +846,18 @@ with tab4:
             with st.spinner("Testing database operations..."):
                 # Test insert
                 test_data = {
+                    'trade_id': str(uuid.uuid4()),
                     'symbol': 'TEST/USD',
                     'side': 'buy',
                     'quantity': 1.0,
                     'price': 100.0,
                     'strategy': 'test',
-                    'trade_timestamp': datetime.now().isoformat()
+                    'trade_timestamp': datetime.now(timezone.utc).isoformat()
                 }
                 
-                success, message = st.session_state.supabase_connector.insert_trade(test_data)
+                success, message, _ = st.session_state.supabase_connector.insert_trade(test_data)
                 if success:
+                    fetch_recent_trades.clear()
                     st.success("✅ Database write test successful")
                     
                     # Test read
@@ -677,11 +941,12 @@ with tab4:
         -- Basic trades table
         CREATE TABLE public.trades (
             id BIGSERIAL PRIMARY KEY,
+            trade_id UUID NOT NULL UNIQUE DEFAULT gen_random_uuid(),
             symbol VARCHAR(20) NOT NULL,
             side VARCHAR(10) NOT NULL,
             quantity DECIMAL(18,8) NOT NULL,
             price DECIMAL(18,8) NOT NULL,
-            timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            trade_timestamp TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
             strategy VARCHAR(50),
             pnl DECIMAL(18,8)
         );
@@ -700,7 +965,13 @@ with tab4:
         with col1:
             if st.button("🔄 Reload Trades"):
                 with st.spinner("Fetching latest trades..."):
-                    trades, message = st.session_state.supabase_connector.get_trades(5)
+                    # Drop cached results so the table below shows fresh data too
+                    fetch_recent_trades.clear()
+                    trades, message = load_recent_trades(
+                        st.session_state.supabase_connector,
+                        10,
+                        TRADE_DISPLAY_COLUMNS
+                    )
                     if trades:
                         st.success(f"✅ Found {len(trades)} recent trades")
                     else:
@@ -714,22 +985,22 @@ with tab4:
     if st.session_state.supabase_connected:
         st.subheader("📊 Recent Trades from Database")
         
-        trades, message = st.session_state.supabase_connector.get_trades(10)
+        trades, message = load_recent_trades(
+            st.session_state.supabase_connector,
+            10,
+            TRADE_DISPLAY_COLUMNS
+        )
         if trades:
-            trades_df = pd.DataFrame(trades)
+            # Only the display columns were requested, so no client-side projection needed
+            trades_df = pd.DataFrame(trades, columns=list(TRADE_DISPLAY_COLUMNS))
             if not trades_df.empty:
-                # Format the dataframe for display
-                if 'trade_timestamp' in trades_df.columns:
-                    trades_df['trade_timestamp'] = pd.to_datetime(trades_df['trade_timestamp']).dt.strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Select relevant columns for display
-                display_cols = ['symbol', 'side', 'quantity', 'price', 'pnl', 'strategy', 'trade_timestamp']
-                available_cols = [col for col in display_cols if col in trades_df.columns]
+                # Format the dataframe for display - PostgREST returns timestamptz
+                # values as ISO strings whose fractional digits vary by row
+                trades_df['trade_timestamp'] = pd.to_datetime(
+                    trades_df['trade_timestamp'], utc=True, format='ISO8601'
+                ).dt.strftime('%Y-%m-%d %H:%M:%S')
                 
-                if available_cols:
-                    st.dataframe(trades_df[available_cols], use_container_width=True)
-                else:
-                    st.dataframe(trades_df, use_container_width=True)
+                st.dataframe(trades_df, use_container_width=True)
             else:
                 st.info("📝 No trades found in database")
         else:
@@ -740,7 +1011,7 @@ with tab4:
     # Exchange API settings
     st.subheader("🏦 Exchange API Configuration")
     
-    exchange = st.selectbox("Select Exchange", ["Binance", "Coinbase Pro", "Kraken", "Alpaca"])
+    exchange = st.selectbox("Select Exchange", EXCHANGES)
     
     col1, col2 = st.columns(2)
     with col1:
@@ -766,6 +1037,7 @@ with tab4:
         st.write("**Available Libraries:**")
         st.write(f"- Supabase: {'✅ Available' if SUPABASE_AVAILABLE else '❌ Not Available (using HTTP fallback)'}")
         st.write(f"- Plotly: {'✅ Available' if PLOTLY_AVAILABLE else '❌ Not Available (using Streamlit charts)'}")
+        st.write(f"- orjson: {'✅ Available' if ORJSON_AVAILABLE else '❌ Not Available (using stdlib json)'}")
         
         if st.session_state.supabase_connected:
             st.write("**Connection Details:**")
@@ -784,7 +1056,6 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Auto-refresh for live data (when trading is active)
-if st.session_state.trading_active:
-    time.sleep(1)
-    st.rerun()
+# Flush buffered trades that have waited longer than the flush interval
+with st.sidebar:
+    flush_stale_trades()